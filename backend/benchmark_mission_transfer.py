@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""Time mission upload/download over an emulated lossy, high-latency link"""
+import argparse
+import asyncio
+import logging
+import random
+import time
+from types import SimpleNamespace
+from mission_manager import MissionManager
+
+class EmulatedMessage(SimpleNamespace):
+    def get_type(self):
+        return self.msg_type
+
+    def get_srcSystem(self):
+        return self.src_system
+
+class EmulatedLink:
+    """Delivers messages after a fixed one-way latency, dropping a fraction of them"""
+    def __init__(self, latency, loss):
+        self.latency = latency
+        self.loss = loss
+        self.sent = 0
+        self.dropped = 0
+
+    def deliver(self, callback, msg):
+        self.sent += 1
+        if random.random() < self.loss:
+            self.dropped += 1
+            return
+        asyncio.get_running_loop().call_later(self.latency, callback, msg)
+
+class EmulatedVehicle:
+    """Minimal autopilot side of the mission protocol
+
+    With strict=True download requests must arrive in order, as on PX4: only the
+    expected seq or a repeat of the previous one is served, anything else is
+    answered with MAV_MISSION_ERROR and ends the transfer.
+    """
+    def __init__(self, system_id, link, manager, mission=None, request_timeout=0.3, strict=False):
+        self.system_id = system_id
+        self.strict = strict
+        self._expected = None
+        self.link = link
+        self.manager = manager
+        self.mission = mission or []
+        self.request_timeout = request_timeout
+        self._upload = None
+        self._upload_task = None
+
+    def reply(self, msg_type, **fields):
+        msg = EmulatedMessage(msg_type=msg_type, src_system=self.system_id, **fields)
+        self.link.deliver(self.manager.handle_message, msg)
+
+    def receive(self, msg_type, fields):
+        if msg_type == 'MISSION_REQUEST_LIST':
+            self._expected = 0
+            self.reply('MISSION_COUNT', count=len(self.mission), mission_type=0)
+        elif msg_type == 'MISSION_REQUEST_INT':
+            seq = fields['seq']
+            if self.strict:
+                if self._expected is None or seq not in (self._expected, self._expected - 1):
+                    self._expected = None
+                    self.reply('MISSION_ACK', type=1, mission_type=0)  # MAV_MISSION_ERROR
+                    return
+                if seq == self._expected:
+                    self._expected += 1
+            self.reply('MISSION_ITEM_INT', **self.mission[seq])
+        elif msg_type == 'MISSION_COUNT':
+            self._upload = [None] * fields['count']
+            if self._upload_task is None or self._upload_task.done():
+                self._upload_task = asyncio.create_task(self._request_items())
+        elif msg_type == 'MISSION_ITEM_INT' and self._upload is not None:
+            self._upload[fields['seq']] = fields
+            if all(item is not None for item in self._upload):
+                self.mission = self._upload
+                self.reply('MISSION_ACK', type=0, mission_type=0)
+
+    async def _request_items(self):
+        # Autopilots request upload items one at a time and re-request on timeout
+        for seq in range(len(self._upload)):
+            while self._upload[seq] is None:
+                self.reply('MISSION_REQUEST_INT', seq=seq, mission_type=0)
+                deadline = time.monotonic() + self.request_timeout
+                while self._upload[seq] is None and time.monotonic() < deadline:
+                    await asyncio.sleep(0.002)
+        if not self._upload:
+            self.reply('MISSION_ACK', type=0, mission_type=0)
+
+class EmulatedMav:
+    """Stands in for master.mav, forwarding sends over the link to the target vehicle"""
+    FIELDS = {
+        'mission_request_list': ('target_system', 'target_component', 'mission_type'),
+        'mission_request_int': ('target_system', 'target_component', 'seq', 'mission_type'),
+        'mission_count': ('target_system', 'target_component', 'count', 'mission_type'),
+        'mission_ack': ('target_system', 'target_component', 'type', 'mission_type'),
+        'mission_item_int': ('target_system', 'target_component', 'seq', 'frame', 'command',
+                             'current', 'autocontinue', 'param1', 'param2', 'param3', 'param4',
+                             'x', 'y', 'z', 'mission_type'),
+    }
+
+    def __init__(self, link):
+        self.link = link
+        self.vehicles = {}
+
+    def __getattr__(self, name):
+        msg_name = name[:-len('_send')]
+        fields = self.FIELDS[msg_name]
+
+        def send(*args):
+            values = dict(zip(fields, args))
+            vehicle = self.vehicles[values['target_system']]
+            self.link.deliver(lambda v: vehicle.receive(msg_name.upper(), v), values)
+        return send
+
+def make_mission(count):
+    return [
+        {
+            'seq': seq, 'frame': 6, 'command': 16, 'current': 0, 'autocontinue': 1,
+            'param1': 0, 'param2': 0, 'param3': 0, 'param4': 0,
+            'x': int((47.3769 + seq * 1e-4) * 1e7), 'y': int(8.5417 * 1e7), 'z': 50.0
+        }
+        for seq in range(count)
+    ]
+
+def setup(args, vehicle_count, mission=None, strict=False, autopilot=None):
+    link = EmulatedLink(args.latency / 1000.0, args.loss)
+    mav = EmulatedMav(link)
+    manager = MissionManager()
+    manager.attach(SimpleNamespace(mav=mav), autopilot)
+    manager.item_timeout = args.timeout
+    manager.max_retries = 20
+    for system_id in range(1, vehicle_count + 1):
+        mav.vehicles[system_id] = EmulatedVehicle(system_id, link, manager, mission, args.timeout, strict)
+    return manager, link
+
+async def run(args):
+    mission = make_mission(args.items)
+    print(f"{args.items} items, {args.latency} ms one-way latency, {args.loss:.0%} loss, "
+          f"{args.timeout:.2f} s item timeout")
+
+    for window in args.windows:
+        manager, link = setup(args, 1, mission)
+        manager.window = window
+        start = time.monotonic()
+        items = await manager.download(1)
+        elapsed = time.monotonic() - start
+        assert items is not None and len(items) == args.items
+        print(f"  download  window={window:<3d} {elapsed:7.2f} s  ({link.dropped} of {link.sent} packets dropped)")
+
+        start = time.monotonic()
+        await manager.download(1)
+        print(f"  download  cached      {time.monotonic() - start:7.4f} s")
+
+    # In-order autopilot: detected as PX4, and unknown (windowed attempt, then fallback)
+    for label, autopilot in (('strict px4', 12), ('strict w=10', None)):
+        manager, link = setup(args, 1, mission, strict=True, autopilot=autopilot)
+        start = time.monotonic()
+        items = await manager.download(1)
+        elapsed = time.monotonic() - start
+        assert items is not None and len(items) == args.items
+        print(f"  download  {label:<11s} {elapsed:7.2f} s  ({link.dropped} of {link.sent} packets dropped)")
+
+    for vehicle_count in (1, args.vehicles):
+        manager, link = setup(args, vehicle_count)
+        start = time.monotonic()
+        results = await manager.upload_many(list(range(1, vehicle_count + 1)), [
+            {'latitude': item['x'] / 1e7, 'longitude': item['y'] / 1e7, 'altitude': item['z']}
+            for item in mission
+        ])
+        elapsed = time.monotonic() - start
+        assert all(results.values())
+        print(f"  upload    vehicles={vehicle_count:<3d} {elapsed:7.2f} s  ({link.dropped} of {link.sent} packets dropped)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=20, help='one-way latency in ms')
+    parser.add_argument('--loss', type=float, default=0.05, help='packet loss probability per direction')
+    parser.add_argument('--timeout', type=float, default=0.25, help='item timeout in seconds')
+    parser.add_argument('--windows', type=int, nargs='+', default=[1, 10, 25])
+    parser.add_argument('--vehicles', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,12 @@ import asyncio
 import logging
 from pymavlink import mavutil
 import json
-import math
+from message_decoders import (
+    decode_heartbeat, decode_global_position_int, decode_vfr_hud,
+    decode_sys_status, decode_attitude
+)
+from parameter_manager import ParameterManager
+from mission_manager import MissionManager, MISSION_MESSAGES
 
 class MAVLinkHandler:
     def __init__(self, connection_string='udp:127.0.0.1:14550'):
@@ -16,14 +21,29 @@ class MAVLinkHandler:
             'battery': {},
             'status': {}
         }
+        self.parameter_manager = ParameterManager()
+        self.mission_manager = MissionManager()
+        self.max_messages_per_poll = 100
+        self.message_handlers = {
+            'HEARTBEAT': self.parse_heartbeat,
+            'GLOBAL_POSITION_INT': self.parse_global_position_int,
+            'VFR_HUD': self.parse_vfr_hud,
+            'SYS_STATUS': self.parse_sys_status,
+            'ATTITUDE': self.parse_attitude,
+            'PARAM_VALUE': self.parameter_manager.handle_param_value
+        }
+        for msg_type in MISSION_MESSAGES:
+            self.message_handlers[msg_type] = self.mission_manager.handle_message
         
     async def connect(self):
         """Connect to MAVLink source"""
         try:
             logging.info(f"Connecting to MAVLink: {self.connection_string}")
             self.master = mavutil.mavlink_connection(self.connection_string)
-            self.master.wait_heartbeat()
+            heartbeat = self.master.wait_heartbeat()
             logging.info("Heartbeat received! Connected to vehicle.")
+            self.parameter_manager.attach(self.master, heartbeat.autopilot)
+            self.mission_manager.attach(self.master, heartbeat.autopilot)
             self.telemetry_data['connected'] = True
             return True
         except Exception as e:
@@ -33,116 +53,39 @@ class MAVLinkHandler:
     
     def parse_heartbeat(self, msg):
         """Parse HEARTBEAT message"""
-        base_mode = msg.base_mode
-        custom_mode = msg.custom_mode
-        system_status = msg.system_status
-        
-        # Determine flight mode
-        flight_mode = "UNKNOWN"
-        if hasattr(msg, 'custom_mode'):
-            # PX4 flight modes
-            if custom_mode == 0:
-                flight_mode = "MANUAL"
-            elif custom_mode == 4:
-                flight_mode = "HOLD"
-            elif custom_mode == 5:
-                flight_mode = "LOITER"
-            elif custom_mode == 10:
-                flight_mode = "AUTO"
-            elif custom_mode == 12:
-                flight_mode = "RTL"
-            elif custom_mode == 14:
-                flight_mode = "LAND"
-            elif custom_mode == 15:
-                flight_mode = "TAKEOFF"
-        
-        self.telemetry_data['heartbeat'] = {
-            'type': msg.type,
-            'autopilot': msg.autopilot,
-            'base_mode': base_mode,
-            'custom_mode': custom_mode,
-            'system_status': system_status,
-            'flight_mode': flight_mode,
-            'mavlink_version': msg.mavlink_version
-        }
+        self.telemetry_data['heartbeat'] = decode_heartbeat(msg)
     
     def parse_global_position_int(self, msg):
         """Parse GLOBAL_POSITION_INT message"""
-        lat = msg.lat / 1e7  # Convert from degE7 to degrees
-        lon = msg.lon / 1e7  # Convert from degE7 to degrees
-        alt = msg.alt / 1000.0  # Convert from mm to meters
-        relative_alt = msg.relative_alt / 1000.0  # Convert from mm to meters
-        
-        self.telemetry_data['position'] = {
-            'latitude': lat,
-            'longitude': lon,
-            'altitude': alt,
-            'relative_altitude': relative_alt,
-            'heading': msg.hdg / 100.0 if msg.hdg != 0 else 0,  # Convert from centidegrees
-            'ground_speed': math.sqrt(msg.vx**2 + msg.vy**2) / 100.0,  # Convert from cm/s to m/s
-            'velocity_x': msg.vx / 100.0,
-            'velocity_y': msg.vy / 100.0,
-            'velocity_z': msg.vz / 100.0
-        }
+        self.telemetry_data['position'] = decode_global_position_int(msg)
     
     def parse_vfr_hud(self, msg):
         """Parse VFR_HUD message"""
-        self.telemetry_data['status'].update({
-            'airspeed': msg.airspeed,
-            'ground_speed': msg.groundspeed,
-            'heading': msg.heading,
-            'throttle': msg.throttle,
-            'altitude': msg.alt,
-            'climb_rate': msg.climb
-        })
+        self.telemetry_data['status'].update(decode_vfr_hud(msg))
     
     def parse_sys_status(self, msg):
         """Parse SYS_STATUS message"""
-        battery_remaining = msg.battery_remaining if msg.battery_remaining != -1 else 0
-        voltage = msg.voltage_battery / 1000.0 if msg.voltage_battery != 0 else 0
-        current = msg.current_battery / 100.0 if msg.current_battery != -1 else 0
-        
-        self.telemetry_data['battery'] = {
-            'remaining': battery_remaining,
-            'voltage': voltage,
-            'current': current,
-            'power_consumed': 0  # Can be calculated from other fields
-        }
+        self.telemetry_data['battery'] = decode_sys_status(msg)
     
     def parse_attitude(self, msg):
         """Parse ATTITUDE message"""
-        roll_deg = math.degrees(msg.roll)
-        pitch_deg = math.degrees(msg.pitch)
-        yaw_deg = math.degrees(msg.yaw)
-        
-        self.telemetry_data['attitude'] = {
-            'roll': roll_deg,
-            'pitch': pitch_deg,
-            'yaw': yaw_deg,
-            'rollspeed': math.degrees(msg.rollspeed),
-            'pitchspeed': math.degrees(msg.pitchspeed),
-            'yawspeed': math.degrees(msg.yawspeed)
-        }
+        self.telemetry_data['attitude'] = decode_attitude(msg)
     
     async def read_messages(self):
         """Continuously read and parse MAVLink messages"""
         while True:
             try:
                 if self.master:
-                    msg = self.master.recv_match(blocking=False)
-                    if msg:
-                        msg_type = msg.get_type()
+                    # Drain pending messages so bursts (e.g. parameter lists) aren't throttled,
+                    # capped so a busy link can't starve the WebSocket tasks
+                    for _ in range(self.max_messages_per_poll):
+                        msg = self.master.recv_match(blocking=False)
+                        if not msg:
+                            break
                         
-                        if msg_type == 'HEARTBEAT':
-                            self.parse_heartbeat(msg)
-                        elif msg_type == 'GLOBAL_POSITION_INT':
-                            self.parse_global_position_int(msg)
-                        elif msg_type == 'VFR_HUD':
-                            self.parse_vfr_hud(msg)
-                        elif msg_type == 'SYS_STATUS':
-                            self.parse_sys_status(msg)
-                        elif msg_type == 'ATTITUDE':
-                            self.parse_attitude(msg)
+                        handler = self.message_handlers.get(msg.get_type())
+                        if handler:
+                            handler(msg)
                         
                 await asyncio.sleep(0.01)  # Small delay to prevent CPU overload
                 
@@ -154,6 +97,55 @@ class MAVLinkHandler:
         """Get current telemetry data"""
         return self.telemetry_data
     
+    async def fetch_parameters(self, force=False):
+        """Fetch all parameters, using the on-disk cache when the vehicle's hash matches"""
+        return await self.parameter_manager.fetch_all(force=force)
+    
+    def get_parameters(self):
+        """Get all known parameters"""
+        return self.parameter_manager.get_parameters()
+    
+    async def get_parameter(self, name, refresh=False):
+        """Get a single parameter value"""
+        try:
+            return await self.parameter_manager.get(name, refresh=refresh)
+        except Exception as e:
+            logging.error(f"Parameter read failed: {e}")
+            return None
+    
+    async def set_parameter(self, name, value):
+        """Set a single parameter value"""
+        try:
+            return await self.parameter_manager.set(name, value)
+        except Exception as e:
+            logging.error(f"Parameter set failed: {e}")
+            return False
+    
+    async def download_mission(self, system_id=None, refresh=False):
+        """Get a vehicle's mission, downloading it only if not already cached
+
+        Cached missions are dropped when MISSION_CURRENT reports a new mission id.
+        Autopilots that don't report one (ArduPilot, older PX4) get a cache that
+        expires after MissionManager.cache_ttl; pass refresh=True to force a download.
+        """
+        try:
+            if system_id is None:
+                system_id = self.master.target_system
+            return await self.mission_manager.download(system_id, refresh=refresh)
+        except Exception as e:
+            logging.error(f"Mission download failed: {e}")
+            return None
+    
+    async def upload_mission(self, items, system_ids=None):
+        """Upload a mission to one or more vehicles concurrently"""
+        try:
+            if not system_ids:
+                system_ids = [self.master.target_system]
+            return await self.mission_manager.upload_many(system_ids, items)
+        except Exception as e:
+            logging.error(f"Mission upload failed: {e}")
+            return {}
+    
     def send_command(self, command_type, **kwargs):
         """Send commands to the vehicle"""
         try:
@@ -0,0 +1,90 @@
+import math
+
+# PX4 custom_mode -> flight mode name
+PX4_FLIGHT_MODES = {
+    0: "MANUAL",
+    4: "HOLD",
+    5: "LOITER",
+    10: "AUTO",
+    12: "RTL",
+    14: "LAND",
+    15: "TAKEOFF"
+}
+
+def decode_heartbeat(msg):
+    """Decode HEARTBEAT message"""
+    # Determine flight mode
+    flight_mode = PX4_FLIGHT_MODES.get(msg.custom_mode, "UNKNOWN")
+
+    return {
+        'type': msg.type,
+        'autopilot': msg.autopilot,
+        'base_mode': msg.base_mode,
+        'custom_mode': msg.custom_mode,
+        'system_status': msg.system_status,
+        'flight_mode': flight_mode,
+        'mavlink_version': msg.mavlink_version
+    }
+
+def decode_global_position_int(msg):
+    """Decode GLOBAL_POSITION_INT message"""
+    lat = msg.lat / 1e7  # Convert from degE7 to degrees
+    lon = msg.lon / 1e7  # Convert from degE7 to degrees
+    alt = msg.alt / 1000.0  # Convert from mm to meters
+    relative_alt = msg.relative_alt / 1000.0  # Convert from mm to meters
+
+    return {
+        'latitude': lat,
+        'longitude': lon,
+        'altitude': alt,
+        'relative_altitude': relative_alt,
+        'heading': msg.hdg / 100.0 if msg.hdg != 0 else 0.0,  # Convert from centidegrees
+        'ground_speed': math.sqrt(msg.vx**2 + msg.vy**2) / 100.0,  # Convert from cm/s to m/s
+        'velocity_x': msg.vx / 100.0,
+        'velocity_y': msg.vy / 100.0,
+        'velocity_z': msg.vz / 100.0
+    }
+
+def decode_vfr_hud(msg):
+    """Decode VFR_HUD message"""
+    return {
+        'airspeed': msg.airspeed,
+        'ground_speed': msg.groundspeed,
+        'heading': msg.heading,
+        'throttle': msg.throttle,
+        'altitude': msg.alt,
+        'climb_rate': msg.climb
+    }
+
+def decode_sys_status(msg):
+    """Decode SYS_STATUS message"""
+    battery_remaining = msg.battery_remaining if msg.battery_remaining != -1 else 0
+    voltage = msg.voltage_battery / 1000.0 if msg.voltage_battery != 0 else 0.0
+    current = msg.current_battery / 100.0 if msg.current_battery != -1 else 0.0
+
+    return {
+        'remaining': battery_remaining,
+        'voltage': voltage,
+        'current': current,
+        'power_consumed': 0.0  # Can be calculated from other fields
+    }
+
+def decode_attitude(msg):
+    """Decode ATTITUDE message"""
+    return {
+        'roll': math.degrees(msg.roll),
+        'pitch': math.degrees(msg.pitch),
+        'yaw': math.degrees(msg.yaw),
+        'rollspeed': math.degrees(msg.rollspeed),
+        'pitchspeed': math.degrees(msg.pitchspeed),
+        'yawspeed': math.degrees(msg.yawspeed)
+    }
+
+# Message type -> decoder, shared by MAVLinkHandler and the offline tlog converter
+DECODERS = {
+    'HEARTBEAT': decode_heartbeat,
+    'GLOBAL_POSITION_INT': decode_global_position_int,
+    'VFR_HUD': decode_vfr_hud,
+    'SYS_STATUS': decode_sys_status,
+    'ATTITUDE': decode_attitude
+}
@@ -0,0 +1,261 @@
+import asyncio
+import logging
+import time
+
+MAV_MISSION_TYPE_MISSION = 0
+MAV_MISSION_ACCEPTED = 0
+MAV_MISSION_ERROR = 1
+MAV_AUTOPILOT_PX4 = 12
+MAV_FRAME_GLOBAL_RELATIVE_ALT_INT = 6
+MAV_CMD_NAV_WAYPOINT = 16
+
+MISSION_MESSAGES = (
+    'MISSION_COUNT', 'MISSION_ITEM_INT', 'MISSION_REQUEST_INT',
+    'MISSION_REQUEST', 'MISSION_ACK', 'MISSION_CURRENT'
+)
+
+def item_from_msg(msg):
+    """Convert a MISSION_ITEM_INT message to a JSON friendly dict"""
+    return {
+        'seq': msg.seq,
+        'frame': msg.frame,
+        'command': msg.command,
+        'current': msg.current,
+        'autocontinue': msg.autocontinue,
+        'param1': msg.param1,
+        'param2': msg.param2,
+        'param3': msg.param3,
+        'param4': msg.param4,
+        'latitude': msg.x / 1e7,  # Convert from degE7 to degrees
+        'longitude': msg.y / 1e7,  # Convert from degE7 to degrees
+        'altitude': msg.z
+    }
+
+def normalize_item(item, seq):
+    """Fill in defaults for a mission item coming from a client"""
+    return {
+        'seq': seq,
+        'frame': item.get('frame', MAV_FRAME_GLOBAL_RELATIVE_ALT_INT),
+        'command': item.get('command', MAV_CMD_NAV_WAYPOINT),
+        'current': item.get('current', 0),
+        'autocontinue': item.get('autocontinue', 1),
+        'param1': item.get('param1', 0),
+        'param2': item.get('param2', 0),
+        'param3': item.get('param3', 0),
+        'param4': item.get('param4', 0),
+        'latitude': item.get('latitude', 0),
+        'longitude': item.get('longitude', 0),
+        'altitude': item.get('altitude', 0)
+    }
+
+class MissionManager:
+    def __init__(self):
+        self.master = None
+        self.missions = {}
+        self.window = 10          # MISSION_REQUEST_INTs in flight during download
+        self.in_order = False     # Autopilot only accepts sequential item requests
+        self.item_timeout = 1.0   # Seconds before an item is retransmitted
+        self.max_retries = 5
+        self.cache_ttl = 60       # Seconds a mission without a mission id is trusted
+        self._inboxes = {}
+        self._locks = {}
+
+    def attach(self, master, autopilot=None):
+        """Attach to a connected mavutil link"""
+        self.master = master
+        # PX4 rejects any request other than the expected seq (or a repeat of the last one)
+        self.in_order = autopilot == MAV_AUTOPILOT_PX4
+
+    def handle_message(self, msg):
+        """Route a mission protocol message to the transfer running for its vehicle"""
+        system_id = msg.get_srcSystem()
+
+        if msg.get_type() == 'MISSION_CURRENT':
+            # A different mission id means the mission changed behind our back
+            mission_id = getattr(msg, 'mission_id', 0)
+            cached = self.missions.get(system_id)
+            if cached and mission_id and cached['opaque_id'] and mission_id != cached['opaque_id']:
+                logging.info(f"Mission on vehicle {system_id} changed, dropping cached copy")
+                del self.missions[system_id]
+            return
+
+        inbox = self._inboxes.get(system_id)
+        if inbox is not None:
+            inbox.put_nowait(msg)
+
+    def get_cached_mission(self, system_id):
+        """Get the cached mission items for a vehicle, None if not cached or expired"""
+        cached = self.missions.get(system_id)
+        if cached is None:
+            return None
+        # Without a mission id a change by another GCS can't be detected, so expire instead
+        if not cached['opaque_id'] and time.time() - cached['updated'] > self.cache_ttl:
+            del self.missions[system_id]
+            return None
+        return cached['items']
+
+    def _cache(self, system_id, items, opaque_id=0):
+        self.missions[system_id] = {
+            'items': items,
+            'opaque_id': opaque_id,
+            'updated': time.time()
+        }
+
+    async def _receive(self, inbox, timeout):
+        try:
+            return await asyncio.wait_for(inbox.get(), max(timeout, 0))
+        except asyncio.TimeoutError:
+            return None
+
+    async def download(self, system_id, component_id=1, refresh=False):
+        """Download a vehicle's mission, pipelining item requests within the window"""
+        if not refresh:
+            cached = self.get_cached_mission(system_id)
+            if cached is not None:
+                return cached
+
+        lock = self._locks.setdefault(system_id, asyncio.Lock())
+        async with lock:
+            window = 1 if self.in_order else self.window
+            while True:
+                inbox = self._inboxes[system_id] = asyncio.Queue()
+                try:
+                    items, aborted = await self._download(inbox, system_id, component_id, window)
+                finally:
+                    del self._inboxes[system_id]
+                if not aborted or window == 1:
+                    return items
+                logging.warning(f"Vehicle {system_id} aborted windowed mission download, retrying in order")
+                window = 1
+
+    async def _download(self, inbox, system_id, component_id, window):
+        """Returns (items, aborted); aborted is True if the vehicle ended the transfer"""
+        start = time.monotonic()
+        mav = self.master.mav
+
+        count_msg = None
+        for _ in range(self.max_retries):
+            mav.mission_request_list_send(system_id, component_id, MAV_MISSION_TYPE_MISSION)
+            deadline = time.monotonic() + self.item_timeout
+            while count_msg is None:
+                msg = await self._receive(inbox, deadline - time.monotonic())
+                if msg is None:
+                    break
+                if msg.get_type() == 'MISSION_COUNT':
+                    count_msg = msg
+            if count_msg is not None:
+                break
+        else:
+            logging.error(f"No MISSION_COUNT from vehicle {system_id}")
+            return None, False
+
+        count = count_msg.count
+        items = [None] * count
+        outstanding = {}  # seq -> (deadline, attempts)
+        next_seq = 0
+        received = 0
+        retransmits = 0
+
+        while received < count:
+            now = time.monotonic()
+            while next_seq < count and len(outstanding) < window:
+                mav.mission_request_int_send(system_id, component_id, next_seq, MAV_MISSION_TYPE_MISSION)
+                outstanding[next_seq] = (now + self.item_timeout, 1)
+                next_seq += 1
+
+            wait = min(deadline for deadline, _ in outstanding.values()) - now
+            msg = await self._receive(inbox, wait)
+            if msg is not None and msg.get_type() == 'MISSION_ITEM_INT' and msg.seq in outstanding:
+                items[msg.seq] = item_from_msg(msg)
+                del outstanding[msg.seq]
+                received += 1
+            elif msg is not None and msg.get_type() == 'MISSION_ACK':
+                logging.error(f"Vehicle {system_id} ended mission download (MAV_MISSION_RESULT {msg.type})")
+                return None, True
+
+            # Retransmit only the requests whose reply timed out
+            now = time.monotonic()
+            for seq, (deadline, attempts) in list(outstanding.items()):
+                if deadline > now:
+                    continue
+                if attempts >= self.max_retries:
+                    logging.error(f"Mission download from vehicle {system_id} failed at item {seq}")
+                    mav.mission_ack_send(system_id, component_id, MAV_MISSION_ERROR, MAV_MISSION_TYPE_MISSION)
+                    return None, False
+                mav.mission_request_int_send(system_id, component_id, seq, MAV_MISSION_TYPE_MISSION)
+                outstanding[seq] = (now + self.item_timeout, attempts + 1)
+                retransmits += 1
+
+        mav.mission_ack_send(system_id, component_id, MAV_MISSION_ACCEPTED, MAV_MISSION_TYPE_MISSION)
+        self._cache(system_id, items, getattr(count_msg, 'opaque_id', 0))
+        logging.info(f"Downloaded {count} mission items from vehicle {system_id} "
+                     f"in {time.monotonic() - start:.2f}s ({retransmits} retransmits)")
+        return items, False
+
+    async def upload(self, system_id, items, component_id=1):
+        """Upload a mission, answering the vehicle's item requests and retransmitting stalled ones"""
+        items = [normalize_item(item, seq) for seq, item in enumerate(items)]
+
+        lock = self._locks.setdefault(system_id, asyncio.Lock())
+        async with lock:
+            inbox = self._inboxes[system_id] = asyncio.Queue()
+            try:
+                return await self._upload(inbox, system_id, component_id, items)
+            finally:
+                del self._inboxes[system_id]
+
+    def _send_item(self, system_id, component_id, item):
+        self.master.mav.mission_item_int_send(
+            system_id, component_id, item['seq'], item['frame'], item['command'],
+            item['current'], item['autocontinue'],
+            item['param1'], item['param2'], item['param3'], item['param4'],
+            int(round(item['latitude'] * 1e7)), int(round(item['longitude'] * 1e7)),
+            item['altitude'], MAV_MISSION_TYPE_MISSION)
+
+    async def _upload(self, inbox, system_id, component_id, items):
+        start = time.monotonic()
+        mav = self.master.mav
+        last_sent = None  # None means MISSION_COUNT, otherwise the last requested seq
+        retries = 0
+        retransmits = 0
+
+        mav.mission_count_send(system_id, component_id, len(items), MAV_MISSION_TYPE_MISSION)
+        while True:
+            msg = await self._receive(inbox, self.item_timeout)
+            if msg is None:
+                retries += 1
+                if retries > self.max_retries:
+                    logging.error(f"Mission upload to vehicle {system_id} timed out")
+                    return False
+                if last_sent is None:
+                    mav.mission_count_send(system_id, component_id, len(items), MAV_MISSION_TYPE_MISSION)
+                else:
+                    self._send_item(system_id, component_id, items[last_sent])
+                retransmits += 1
+                continue
+
+            msg_type = msg.get_type()
+            if msg_type in ('MISSION_REQUEST_INT', 'MISSION_REQUEST'):
+                if msg.seq >= len(items):
+                    continue
+                self._send_item(system_id, component_id, items[msg.seq])
+                last_sent = msg.seq
+                retries = 0
+            elif msg_type == 'MISSION_ACK':
+                if msg.type != MAV_MISSION_ACCEPTED:
+                    logging.error(f"Vehicle {system_id} rejected mission (MAV_MISSION_RESULT {msg.type})")
+                    return False
+                self._cache(system_id, items, getattr(msg, 'opaque_id', 0))
+                logging.info(f"Uploaded {len(items)} mission items to vehicle {system_id} "
+                             f"in {time.monotonic() - start:.2f}s ({retransmits} retransmits)")
+                return True
+
+    async def upload_many(self, system_ids, items, component_id=1):
+        """Upload the same mission to several vehicles concurrently"""
+        results = await asyncio.gather(
+            *[self.upload(system_id, items, component_id) for system_id in system_ids],
+            return_exceptions=True)
+        return {
+            system_id: result is True
+            for system_id, result in zip(system_ids, results)
+        }
@@ -0,0 +1,328 @@
+import asyncio
+import json
+import logging
+import os
+import struct
+import time
+
+# MAV_PARAM_TYPE -> struct format for bytewise (PX4) value encoding
+PARAM_TYPE_FORMATS = {
+    1: '<B',   # UINT8
+    2: '<b',   # INT8
+    3: '<H',   # UINT16
+    4: '<h',   # INT16
+    5: '<I',   # UINT32
+    6: '<i',   # INT32
+    9: '<f',   # REAL32
+}
+PARAM_TYPE_REAL32 = 9
+
+HASH_CHECK_PARAM = '_HASH_CHECK'
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.mavlink_gcs', 'param_cache')
+
+class ParameterManager:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.master = None
+        self.bytewise = False  # PX4 packs integer params bytewise into the float field
+        self.parameters = {}
+        self.param_count = None
+        self.param_hash = None
+        self.loaded_from_cache = False
+        self.received_indices = set()
+        self.quiet_timeout = 1.0    # Seconds without PARAM_VALUE before gap detection runs
+        self.request_timeout = 1.0  # Seconds to wait for a single PARAM_VALUE reply
+        self.request_window = 20    # Re-requests in flight at once
+        self.max_retries = 5
+        self._update_event = asyncio.Event()
+        self._fetch_lock = asyncio.Lock()
+        self._pending = {}
+
+    def attach(self, master, autopilot=None):
+        """Attach to a connected mavutil link"""
+        self.master = master
+        self.bytewise = autopilot == 12  # MAV_AUTOPILOT_PX4
+
+    def decode_value(self, raw_value, param_type):
+        """Convert the float carried in PARAM_VALUE to the parameter's native value"""
+        fmt = PARAM_TYPE_FORMATS.get(param_type)
+        if fmt is None or param_type == PARAM_TYPE_REAL32:
+            return raw_value
+        if self.bytewise:
+            packed = struct.pack('<f', raw_value)
+            return struct.unpack(fmt, packed[:struct.calcsize(fmt)])[0]
+        return int(raw_value)
+
+    def encode_value(self, value, param_type):
+        """Convert a native value to the float sent in PARAM_SET"""
+        fmt = PARAM_TYPE_FORMATS.get(param_type)
+        if fmt is None or param_type == PARAM_TYPE_REAL32:
+            # Round to float32 so the value compares equal to the vehicle's echo
+            return struct.unpack('<f', struct.pack('<f', float(value)))[0]
+        if self.bytewise:
+            packed = struct.pack(fmt, int(value)).ljust(4, b'\x00')
+            return struct.unpack('<f', packed)[0]
+        return float(int(value))
+
+    def handle_param_value(self, msg):
+        """Handle an incoming PARAM_VALUE message"""
+        # Ignore cameras, gimbals and other vehicles sharing the link
+        if (msg.get_srcSystem() != self.master.target_system
+                or msg.get_srcComponent() != self.master.target_component):
+            return
+
+        name = msg.param_id
+        if name == HASH_CHECK_PARAM:
+            value = struct.unpack('<I', struct.pack('<f', msg.param_value))[0]
+        else:
+            value = self.decode_value(msg.param_value, msg.param_type)
+            previous = self.parameters.get(name)
+            index = previous['index'] if previous else None
+            # PARAM_SET echoes may carry index 65535; keep the real index in that case
+            if 0 <= msg.param_index < msg.param_count:
+                index = msg.param_index
+                self.received_indices.add(index)
+            self.parameters[name] = {
+                'value': value,
+                'type': msg.param_type,
+                'index': index
+            }
+            if msg.param_count > 0:
+                self.param_count = msg.param_count
+
+        for future in self._pending.pop(name, []):
+            if not future.done():
+                future.set_result(value)
+        self._update_event.set()
+
+    def missing_indices(self):
+        """Indices announced by param_count that have not been received yet"""
+        if self.param_count is None:
+            return []
+        return [i for i in range(self.param_count) if i not in self.received_indices]
+
+    def get_parameters(self):
+        """Get all known parameters as name -> value"""
+        return {name: param['value'] for name, param in self.parameters.items()}
+
+    def get_status(self):
+        """Get download/cache status"""
+        return {
+            'param_count': self.param_count,
+            'received': len(self.received_indices),
+            'hash': self.param_hash,
+            'from_cache': self.loaded_from_cache
+        }
+
+    async def _wait_for_value(self, name, timeout):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(name, []).append(future)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            waiters = self._pending.get(name)
+            if waiters and future in waiters:
+                waiters.remove(future)
+                if not waiters:
+                    del self._pending[name]
+
+    async def _wait_for_quiet(self, indices=None):
+        """Wait until the PARAM_VALUE stream goes quiet or the given indices arrive"""
+        while True:
+            if indices is not None and indices <= self.received_indices:
+                return
+            if self.param_count is not None and not self.missing_indices():
+                return
+            self._update_event.clear()
+            try:
+                await asyncio.wait_for(self._update_event.wait(), self.quiet_timeout)
+            except asyncio.TimeoutError:
+                return
+
+    async def request_hash(self):
+        """Ask the autopilot for its parameter hash, None if unsupported"""
+        for _ in range(2):
+            self.master.mav.param_request_read_send(
+                self.master.target_system, self.master.target_component,
+                HASH_CHECK_PARAM.encode('utf8'), -1)
+            value = await self._wait_for_value(HASH_CHECK_PARAM, self.request_timeout)
+            if value is not None:
+                return value
+        return None
+
+    async def fetch_all(self, force=False):
+        """Load parameters from cache if the hash matches, otherwise download them"""
+        # Concurrent fetches (startup vs. client refresh) would reset each other's state
+        async with self._fetch_lock:
+            return await self._fetch_all(force)
+
+    async def _fetch_all(self, force):
+        try:
+            remote_hash = await self.request_hash()
+            if not force and remote_hash is not None and self.load_cache(remote_hash):
+                logging.info(f"Parameter hash {remote_hash:08x} matches cache, skipping download")
+                return True
+
+            if not await self.download():
+                return False
+
+            self.param_hash = remote_hash if remote_hash is not None else await self.request_hash()
+            self.loaded_from_cache = False
+            self.save_cache()
+            return True
+        except Exception as e:
+            logging.error(f"Parameter fetch failed: {e}")
+            return False
+
+    async def download(self):
+        """Download the full parameter list, re-requesting only missing indices"""
+        self.parameters = {}
+        self.param_count = None
+        self.received_indices = set()
+        start = time.monotonic()
+
+        for _ in range(self.max_retries):
+            self.master.mav.param_request_list_send(
+                self.master.target_system, self.master.target_component)
+            await self._wait_for_quiet()
+            if self.param_count is not None:
+                break
+        else:
+            logging.error("No response to PARAM_REQUEST_LIST")
+            return False
+
+        for attempt in range(self.max_retries):
+            missing = self.missing_indices()
+            if not missing:
+                break
+            logging.info(f"Re-requesting {len(missing)} missing parameters (attempt {attempt + 1})")
+            for i in range(0, len(missing), self.request_window):
+                window = missing[i:i + self.request_window]
+                for index in window:
+                    self.master.mav.param_request_read_send(
+                        self.master.target_system, self.master.target_component,
+                        b'', index)
+                await self._wait_for_quiet(set(window))
+
+        missing = self.missing_indices()
+        if missing:
+            logging.error(f"Parameter download incomplete, {len(missing)} of {self.param_count} missing")
+            return False
+
+        logging.info(f"Downloaded {self.param_count} parameters in {time.monotonic() - start:.1f}s")
+        return True
+
+    async def get(self, name, refresh=False):
+        """Get a parameter value, reading it from the vehicle if unknown or refresh is set"""
+        if not refresh and name in self.parameters:
+            return self.parameters[name]['value']
+
+        for _ in range(self.max_retries):
+            self.master.mav.param_request_read_send(
+                self.master.target_system, self.master.target_component,
+                name.encode('utf8'), -1)
+            value = await self._wait_for_value(name, self.request_timeout)
+            if value is not None:
+                return value
+        return None
+
+    async def set(self, name, value):
+        """Set a parameter and wait for the vehicle to echo the new value"""
+        # Serialized with fetches: a running download resets the table this relies on,
+        # and the hash refresh/cache save must not interleave with one
+        async with self._fetch_lock:
+            return await self._set(name, value)
+
+    async def _set(self, name, value):
+        if name not in self.parameters:
+            # The type decides the encoding, so learn it from the vehicle first
+            if await self.get(name, refresh=True) is None:
+                logging.error(f"Cannot set unknown parameter {name}: no reply from vehicle")
+                return False
+        param_type = self.parameters[name]['type']
+        encoded = self.encode_value(value, param_type)
+
+        for _ in range(self.max_retries):
+            self.master.mav.param_set_send(
+                self.master.target_system, self.master.target_component,
+                name.encode('utf8'), encoded, param_type)
+            echoed = await self._wait_for_value(name, self.request_timeout)
+            if echoed is None:
+                continue
+            if echoed != self.decode_value(encoded, param_type):
+                logging.warning(f"Parameter {name} rejected, vehicle reports {echoed}")
+                return False
+
+            # The vehicle's hash changed with the value; refresh it so the cache stays valid.
+            # Vehicles that never reported a hash (ArduPilot) have nothing to refresh.
+            if self.param_hash is not None:
+                new_hash = await self.request_hash()
+                if new_hash is not None:
+                    self.param_hash = new_hash
+                    self.save_cache()
+            return True
+
+        logging.error(f"No acknowledgement setting parameter {name}")
+        return False
+
+    def _cache_path(self, param_hash):
+        return os.path.join(
+            self.cache_dir,
+            f"sys{self.master.target_system}_comp{self.master.target_component}_{param_hash:08x}.json")
+
+    def load_cache(self, param_hash):
+        """Load parameters cached under the given hash, returns False on miss"""
+        path = self._cache_path(param_hash)
+        try:
+            with open(path) as f:
+                cached = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable parameter cache {path}: {e}")
+            return False
+
+        if cached.get('hash') != param_hash:
+            return False
+
+        param_count = cached.get('param_count')
+        indices = {
+            param['index'] for param in cached.get('parameters', {}).values() if param['index'] is not None
+        }
+        if param_count is None or not indices >= set(range(param_count)):
+            logging.warning(f"Ignoring incomplete parameter cache {path}")
+            return False
+
+        self.parameters = cached['parameters']
+        self.param_count = param_count
+        self.received_indices = indices
+        self.param_hash = param_hash
+        self.loaded_from_cache = True
+        return True
+
+    def save_cache(self):
+        """Persist the parameter set under its hash; vehicles without hash support are not cached"""
+        if self.param_hash is None:
+            return False
+        # A partial set saved under the real hash would be trusted on every reconnect
+        if self.param_count is None or self.missing_indices():
+            return False
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._cache_path(self.param_hash)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump({
+                    'hash': self.param_hash,
+                    'param_count': self.param_count,
+                    'parameters': self.parameters,
+                    'saved_at': time.time()
+                }, f)
+            os.replace(tmp_path, path)
+            return True
+        except OSError as e:
+            logging.error(f"Failed to write parameter cache: {e}")
+            return False
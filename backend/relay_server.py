@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+import websockets
+import json
+import logging
+
+class UpstreamBackend:
+    """Single WebSocket subscription to a field GCS backend"""
+    def __init__(self, backend_id, url):
+        self.backend_id = backend_id
+        self.url = url
+        self.online = False
+        self.data = {}
+        self.timestamp = None
+        self.version = 0
+        self.payload_bytes_received = 0  # Uncompressed message bytes, not wire bytes
+
+    async def run(self, on_update):
+        """Keep the upstream connection open, reconnecting with backoff"""
+        delay = 1
+        while True:
+            try:
+                async with websockets.connect(self.url, compression='deflate') as websocket:
+                    self.online = True
+                    delay = 1
+                    logging.info(f"Relay connected to backend {self.backend_id} at {self.url}")
+                    async for message in websocket:
+                        self.payload_bytes_received += len(message.encode() if isinstance(message, str) else message)
+                        self.handle_message(message)
+                        on_update()
+            except (OSError, websockets.exceptions.WebSocketException) as e:
+                logging.warning(f"Backend {self.backend_id} unavailable: {e}")
+            except Exception as e:
+                # Anything unexpected must still end in a backoff and reconnect
+                logging.error(f"Backend {self.backend_id} connection failed: {e}")
+
+            if self.online:
+                self.online = False
+                self.version += 1
+                on_update()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+
+    def handle_message(self, message):
+        try:
+            data = json.loads(message)
+        except json.JSONDecodeError as e:
+            logging.error(f"Invalid JSON from backend {self.backend_id}: {e}")
+            return
+
+        if not isinstance(data, dict) or not isinstance(data.get('data', {}), dict):
+            logging.error(f"Unexpected message from backend {self.backend_id}: {message[:100]!r}")
+            return
+
+        if data.get('type') in ('initial', 'telemetry'):
+            self.data = data.get('data', {})
+            self.timestamp = data.get('timestamp')
+            self.version += 1
+
+    def snapshot(self, fields=None):
+        """Latest telemetry, optionally reduced to the given top-level fields"""
+        data = self.data
+        if fields is not None:
+            data = {key: value for key, value in data.items() if key in fields}
+        return {
+            'online': self.online,
+            'timestamp': self.timestamp,
+            'data': data
+        }
+
+class GCSRelayServer:
+    """Aggregates several GCS backends over one upstream connection each and fans out to viewers"""
+    def __init__(self, upstreams, host='0.0.0.0', port=8770, rate=10):
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self.backends = {
+            backend_id: UpstreamBackend(backend_id, url)
+            for backend_id, url in upstreams.items()
+        }
+        self.subscriptions = {}  # viewer -> (vehicles, fields), None meaning everything
+        self.payload_bytes_sent = 0  # Uncompressed message bytes, not wire bytes
+        self._updated = asyncio.Event()
+
+    async def start(self):
+        """Start upstream subscriptions and the viewer-facing WebSocket server"""
+        for backend in self.backends.values():
+            asyncio.create_task(backend.run(self._updated.set))
+
+        # permessage-deflate keeps repetitive telemetry JSON small on the viewer links
+        start_server = websockets.serve(self.handle_client, self.host, self.port, compression='deflate')
+        await start_server
+        logging.info(f"Relay server started on ws://{self.host}:{self.port} "
+                     f"for {len(self.backends)} backends")
+
+        asyncio.create_task(self.broadcast_fleet())
+
+    async def handle_client(self, websocket, path):
+        """Handle viewer connections"""
+        self.subscriptions[websocket] = (None, None)
+        logging.info(f"New viewer connected. Total viewers: {len(self.subscriptions)}")
+
+        try:
+            await self.send(websocket, self.fleet_message(None, None))
+
+            async for message in websocket:
+                await self.handle_client_message(websocket, message)
+
+        except websockets.exceptions.ConnectionClosed:
+            logging.info("Viewer disconnected")
+        finally:
+            del self.subscriptions[websocket]
+            logging.info(f"Viewer removed. Total viewers: {len(self.subscriptions)}")
+
+    async def handle_client_message(self, websocket, message):
+        """Handle subscription changes from viewers"""
+        try:
+            data = json.loads(message)
+            if not isinstance(data, dict):
+                response = {
+                    'type': 'error',
+                    'message': 'Messages must be JSON objects'
+                }
+                await self.send(websocket, json.dumps(response))
+                return
+
+            message_type = data.get('type')
+
+            if message_type == 'subscribe':
+                vehicles = data.get('vehicles')
+                fields = data.get('fields')
+                if not (is_string_list(vehicles) and is_string_list(fields)):
+                    response = {
+                        'type': 'error',
+                        'message': "'vehicles' and 'fields' must be lists of strings or null"
+                    }
+                    await self.send(websocket, json.dumps(response))
+                    return
+
+                self.subscriptions[websocket] = (
+                    frozenset(vehicles) if vehicles is not None else None,
+                    frozenset(fields) if fields is not None else None
+                )
+                await self.send(websocket, self.fleet_message(*self.subscriptions[websocket]))
+
+            elif message_type == 'relay_status':
+                response = {
+                    'type': 'relay_status',
+                    'status': self.get_status()
+                }
+                await self.send(websocket, json.dumps(response))
+
+        except json.JSONDecodeError as e:
+            logging.error(f"Invalid JSON message: {e}")
+
+    async def send(self, websocket, message):
+        """Send to a viewer, counting the uncompressed payload"""
+        self.payload_bytes_sent += len(message.encode())
+        await websocket.send(message)
+
+    def fleet_message(self, vehicles, fields):
+        """Serialized fleet telemetry for one subscription"""
+        message = {
+            'type': 'fleet_telemetry',
+            'vehicles': {
+                backend_id: backend.snapshot(fields)
+                for backend_id, backend in self.backends.items()
+                if vehicles is None or backend_id in vehicles
+            },
+            'timestamp': asyncio.get_event_loop().time()
+        }
+        return json.dumps(message)
+
+    def get_status(self):
+        """Upstream/downstream connection and traffic counters"""
+        return {
+            'backends': {
+                backend_id: {
+                    'url': backend.url,
+                    'online': backend.online,
+                    'payload_bytes_received': backend.payload_bytes_received
+                }
+                for backend_id, backend in self.backends.items()
+            },
+            'viewers': len(self.subscriptions),
+            'payload_bytes_sent': self.payload_bytes_sent
+        }
+
+    async def broadcast_fleet(self):
+        """Fan merged telemetry out to viewers, serializing once per distinct subscription"""
+        sent_versions = {}
+        while True:
+            await self._updated.wait()
+            self._updated.clear()
+
+            if self.subscriptions:
+                versions = {backend_id: backend.version for backend_id, backend in self.backends.items()}
+                messages = {}
+                tasks = []
+                for client, subscription in list(self.subscriptions.items()):
+                    vehicles = subscription[0]
+                    changed = any(
+                        versions[backend_id] != sent_versions.get(backend_id)
+                        for backend_id in versions
+                        if vehicles is None or backend_id in vehicles
+                    )
+                    if not changed:
+                        continue
+                    if subscription not in messages:
+                        messages[subscription] = self.fleet_message(*subscription)
+                    tasks.append(self.send(client, messages[subscription]))
+                if tasks:
+                    await asyncio.gather(*tasks, return_exceptions=True)
+                sent_versions = versions
+
+            await asyncio.sleep(1 / self.rate)  # Cap the viewer update rate
+
+def is_string_list(value):
+    """True for None (no filter) or a list of strings"""
+    return value is None or (isinstance(value, list) and all(isinstance(item, str) for item in value))
+
+def parse_upstreams(specs):
+    """Parse 'name=ws://host:port' (or bare URL) upstream arguments"""
+    upstreams = {}
+    for spec in specs:
+        name, sep, url = spec.partition('=')
+        if not sep:
+            url = spec
+            name = url.split('://', 1)[-1]
+        upstreams[name] = url
+    return upstreams
+
+async def main():
+    parser = argparse.ArgumentParser(description='Relay several GCS backends to remote viewers')
+    parser.add_argument('--upstream', action='append', required=True,
+                        help="backend to subscribe to, as name=ws://host:port (repeatable)")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8770)
+    parser.add_argument('--rate', type=float, default=10, help='max viewer updates per second')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    server = GCSRelayServer(parse_upstreams(args.upstream), args.host, args.port, args.rate)
+    await server.start()
+
+    # Keep the server running
+    await asyncio.Future()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,4 +1,5 @@
 #!/usr/bin/env python3
+import argparse
 import asyncio
 import websockets
 import json
@@ -71,6 +72,10 @@ class MockGCSWebSocketServer:
             await asyncio.sleep(0.1)  # 10 Hz update rate
 
 async def main():
+    parser = argparse.ArgumentParser(description='Mock MAVLink GCS backend')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+    
     logging.basicConfig(
         level=logging.INFO,
         format='%(asctime)s - %(levelname)s - %(message)s'
@@ -79,7 +84,7 @@ async def main():
     logging.info("Starting Mock MAVLink GCS Backend Server")
     
     try:
-        server = MockGCSWebSocketServer(host='0.0.0.0', port=8765)
+        server = MockGCSWebSocketServer(host='0.0.0.0', port=args.port)
         await server.start()
         
         # Keep the server running
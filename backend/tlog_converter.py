@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""Convert MAVLink telemetry logs (.tlog) into per-message-type columnar files"""
+import argparse
+import importlib
+import logging
+import math
+import os
+import shutil
+import struct
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from message_decoders import DECODERS
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:
+    pyarrow = None
+
+MAVLINK_V1_STX = 0xFE
+MAVLINK_V2_STX = 0xFD
+MAVLINK_IFLAG_SIGNED = 0x01
+TIMESTAMP_SIZE = 8
+MIN_TIMESTAMP_US = 946684800 * 10**6   # 2000-01-01
+MAX_TIMESTAMP_US = 4102444800 * 10**6  # 2100-01-01
+SYNC_RECORDS = 4                        # Consecutive valid records needed to trust a boundary
+SCAN_SIZE = 1 << 20                     # Bytes searched for a boundary near each split point
+MIN_CHUNK_SIZE = 1 << 20
+# Record metadata; the underscore keeps them apart from message fields such as
+# FOLLOW_TARGET.timestamp
+META_COLUMNS = ('_timestamp', '_system_id', '_component_id')
+
+def record_length(buf, pos):
+    """Length of the tlog record (timestamp + frame) at pos, None if it isn't one"""
+    if pos + TIMESTAMP_SIZE + 3 > len(buf):
+        return None
+    timestamp = struct.unpack_from('>Q', buf, pos)[0]
+    if not MIN_TIMESTAMP_US <= timestamp < MAX_TIMESTAMP_US:
+        return None
+
+    stx = buf[pos + TIMESTAMP_SIZE]
+    payload_len = buf[pos + TIMESTAMP_SIZE + 1]
+    if stx == MAVLINK_V1_STX:
+        return TIMESTAMP_SIZE + 6 + payload_len + 2
+    if stx == MAVLINK_V2_STX:
+        length = TIMESTAMP_SIZE + 10 + payload_len + 2
+        if buf[pos + TIMESTAMP_SIZE + 2] & MAVLINK_IFLAG_SIGNED:
+            length += 13
+        return length
+    return None
+
+def is_record_chain(buf, pos, at_eof):
+    """True if SYNC_RECORDS well-formed records follow each other from pos"""
+    for _ in range(SYNC_RECORDS):
+        if pos == len(buf) and at_eof:
+            return True
+        length = record_length(buf, pos)
+        if length is None or pos + length > len(buf):
+            return False
+        pos += length
+    return True
+
+def find_record_start(buf, pos, at_eof):
+    """First offset at or after pos where a chain of records begins, None if not found"""
+    for candidate in range(pos, len(buf)):
+        if is_record_chain(buf, candidate, at_eof):
+            return candidate
+    return None
+
+def split_points(path, chunk_count):
+    """Split a tlog into byte ranges that start on record boundaries"""
+    size = os.path.getsize(path)
+    boundaries = [0]
+    with open(path, 'rb') as f:
+        for i in range(1, chunk_count):
+            offset = size * i // chunk_count
+            if offset <= boundaries[-1]:
+                continue
+            f.seek(offset)
+            buf = f.read(SCAN_SIZE)
+            start = find_record_start(buf, 0, offset + len(buf) >= size)
+            if start is not None and offset + start < size:
+                boundaries.append(offset + start)
+    boundaries.append(size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+def raw_columns(msg):
+    """Scalar fields from a message's definition (char arrays are kept as strings)"""
+    return [
+        name for name, field_type, length in zip(msg.fieldnames, msg.fieldtypes, msg.array_lengths)
+        if length == 0 or field_type == 'char'
+    ]
+
+def row_from_msg(msg, all_types):
+    """Decoded columns for a message, None if the type isn't converted"""
+    decoder = DECODERS.get(msg.get_type())
+    if decoder:
+        return decoder(msg)
+    if all_types:
+        return {name: getattr(msg, name) for name in raw_columns(msg)}
+    return None
+
+def parse_chunk(path, start, end, dialect, part_dir, all_types):
+    """Parse one byte range of a tlog and save its columns as .npy parts"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        buf = bytearray(f.read(end - start))
+
+    mavlink = importlib.import_module(f'pymavlink.dialects.v20.{dialect}')
+    mav = mavlink.MAVLink(None)
+    tables = {}
+    records = 0
+    bad = 0
+
+    pos = 0
+    while pos < len(buf):
+        length = record_length(buf, pos)
+        if length is None or pos + length > len(buf):
+            bad += 1
+            next_pos = find_record_start(buf, pos + 1, True)
+            if next_pos is None:
+                break
+            pos = next_pos
+            continue
+
+        timestamp = struct.unpack_from('>Q', buf, pos)[0]
+        try:
+            msg = mav.decode(buf[pos + TIMESTAMP_SIZE:pos + length])
+        except Exception:
+            # Unknown message ids are skipped by length; corrupt frames need a resync
+            bad += 1
+            if is_record_chain(buf, pos + length, True):
+                pos += length
+            else:
+                next_pos = find_record_start(buf, pos + 1, True)
+                if next_pos is None:
+                    break
+                pos = next_pos
+            continue
+        pos += length
+        records += 1
+
+        row = row_from_msg(msg, all_types)
+        if row is None:
+            continue
+
+        # Decoders and message definitions give every row of a type the same keys,
+        # so the column set is fixed when the table is created
+        msg_type = msg.get_type()
+        table = tables.get(msg_type)
+        if table is None:
+            table = tables[msg_type] = {key: [] for key in META_COLUMNS + tuple(row)}
+        table['_timestamp'].append(timestamp / 1e6)  # Convert from us to seconds
+        table['_system_id'].append(msg.get_srcSystem())
+        table['_component_id'].append(msg.get_srcComponent())
+        for key, column in table.items():
+            if key not in META_COLUMNS:
+                column.append(row[key])
+
+    rows = {}
+    for msg_type, table in tables.items():
+        type_dir = os.path.join(part_dir, msg_type)
+        os.makedirs(type_dir, exist_ok=True)
+        for key, column in table.items():
+            np.save(os.path.join(type_dir, f'{key}.npy'), np.asarray(column))
+        rows[msg_type] = len(table['_timestamp'])
+
+    return {'rows': rows, 'records': records, 'bad': bad}
+
+def merge_parts(part_dirs, msg_type, out_dir):
+    """Concatenate per-chunk columns of one message type into memory-mappable .npy files"""
+    type_dirs = [os.path.join(d, msg_type) for d in part_dirs if os.path.isdir(os.path.join(d, msg_type))]
+    out_type_dir = os.path.join(out_dir, msg_type)
+    os.makedirs(out_type_dir, exist_ok=True)
+
+    for filename in sorted(os.listdir(type_dirs[0])):
+        parts = [np.load(os.path.join(d, filename), mmap_mode='r') for d in type_dirs]
+        dtype = np.result_type(*[part.dtype for part in parts])
+        merged = np.lib.format.open_memmap(
+            os.path.join(out_type_dir, filename), mode='w+', dtype=dtype,
+            shape=(sum(len(part) for part in parts),))
+        offset = 0
+        for part in parts:
+            merged[offset:offset + len(part)] = part
+            offset += len(part)
+        merged.flush()
+        del merged
+
+def load_table(out_dir, msg_type):
+    """Load a converted message type as memory-mapped columns"""
+    type_dir = os.path.join(out_dir, msg_type)
+    return {
+        filename[:-len('.npy')]: np.load(os.path.join(type_dir, filename), mmap_mode='r')
+        for filename in sorted(os.listdir(type_dir)) if filename.endswith('.npy')
+    }
+
+def write_parquet(out_dir, msg_type):
+    """Write a converted message type as a Parquet file next to its .npy columns"""
+    table = pyarrow.table({key: np.asarray(column) for key, column in load_table(out_dir, msg_type).items()})
+    pq.write_table(table, os.path.join(out_dir, f'{msg_type}.parquet'))
+
+def convert_tlog(path, out_dir, workers=None, chunk_size=64 << 20, dialect='ardupilotmega',
+                 formats=('numpy',), all_types=False):
+    """Convert a tlog in parallel; returns row counts per message type"""
+    if 'parquet' in formats and pyarrow is None:
+        raise RuntimeError("Parquet output requires pyarrow (pip install pyarrow)")
+
+    start_time = time.monotonic()
+    workers = workers or os.cpu_count() or 1
+    size = os.path.getsize(path)
+    chunk_count = max(math.ceil(size / chunk_size), min(workers, math.ceil(size / MIN_CHUNK_SIZE)), 1)
+    ranges = split_points(path, chunk_count)
+
+    os.makedirs(out_dir, exist_ok=True)
+    scratch_dir = tempfile.mkdtemp(prefix='.parts-', dir=out_dir)
+    try:
+        part_dirs = [os.path.join(scratch_dir, f'{i:05d}') for i in range(len(ranges))]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(parse_chunk, path, start, end, dialect, part_dir, all_types)
+                for (start, end), part_dir in zip(ranges, part_dirs)
+            ]
+            results = [future.result() for future in futures]
+
+        rows = {}
+        for result in results:
+            for msg_type, count in result['rows'].items():
+                rows[msg_type] = rows.get(msg_type, 0) + count
+
+        for msg_type in rows:
+            merge_parts(part_dirs, msg_type, out_dir)
+            if 'parquet' in formats:
+                write_parquet(out_dir, msg_type)
+            if 'numpy' not in formats:
+                shutil.rmtree(os.path.join(out_dir, msg_type))
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    elapsed = time.monotonic() - start_time
+    records = sum(result['records'] for result in results)
+    bad = sum(result['bad'] for result in results)
+    logging.info(f"Converted {records} records ({bad} skipped) from {size / 1e6:.1f} MB in "
+                 f"{elapsed:.2f}s using {len(ranges)} chunks on {workers} workers "
+                 f"({size / 1e6 / elapsed:.1f} MB/s)")
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('tlog', help='telemetry log to convert')
+    parser.add_argument('-o', '--output', required=True, help='output directory')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='parser processes (default: all cores)')
+    parser.add_argument('--chunk-size', type=int, default=64, help='target chunk size in MB')
+    parser.add_argument('--dialect', default='ardupilotmega', help='pymavlink MAVLink 2 dialect')
+    parser.add_argument('--format', choices=['numpy', 'parquet', 'both'], default='numpy')
+    parser.add_argument('--all-types', action='store_true',
+                        help='also convert message types without a decoder, using raw fields')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    formats = ('numpy', 'parquet') if args.format == 'both' else (args.format,)
+    rows = convert_tlog(args.tlog, args.output, args.workers, args.chunk_size << 20,
+                        args.dialect, formats, args.all_types)
+    for msg_type, count in sorted(rows.items()):
+        logging.info(f"  {msg_type}: {count} rows")
+
+if __name__ == "__main__":
+    main()
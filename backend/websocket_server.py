@@ -14,11 +14,15 @@ class GCSWebSocketServer:
     async def start(self):
         """Start the WebSocket server and MAVLink connection"""
         # Connect to MAVLink
-        await self.mavlink_handler.connect()
+        connected = await self.mavlink_handler.connect()
         
         # Start MAVLink message reading
         asyncio.create_task(self.mavlink_handler.read_messages())
         
+        # Load parameters in the background (from cache when the vehicle's hash matches)
+        if connected:
+            asyncio.create_task(self.mavlink_handler.fetch_parameters())
+        
         # Start WebSocket server
         start_server = websockets.serve(self.handle_client, self.host, self.port)
         await start_server
@@ -69,6 +73,65 @@ class GCSWebSocketServer:
                     'success': success
                 }
                 await websocket.send(json.dumps(response))
+            
+            elif message_type == 'param_list':
+                if data.get('refresh'):
+                    await self.mavlink_handler.fetch_parameters(force=data.get('force', False))
+                
+                response = {
+                    'type': 'param_list',
+                    'parameters': self.mavlink_handler.get_parameters(),
+                    'status': self.mavlink_handler.parameter_manager.get_status()
+                }
+                await websocket.send(json.dumps(response))
+            
+            elif message_type == 'param_get':
+                name = data.get('name')
+                value = await self.mavlink_handler.get_parameter(name, refresh=data.get('refresh', False))
+                
+                response = {
+                    'type': 'param_value',
+                    'name': name,
+                    'value': value,
+                    'success': value is not None
+                }
+                await websocket.send(json.dumps(response))
+            
+            elif message_type == 'param_set':
+                name = data.get('name')
+                value = data.get('value')
+                success = await self.mavlink_handler.set_parameter(name, value)
+                
+                response = {
+                    'type': 'param_set_response',
+                    'name': name,
+                    'value': value,
+                    'success': success
+                }
+                await websocket.send(json.dumps(response))
+            
+            elif message_type == 'mission_download':
+                system_id = data.get('system_id')
+                items = await self.mavlink_handler.download_mission(system_id, refresh=data.get('refresh', False))
+                
+                response = {
+                    'type': 'mission',
+                    'system_id': system_id,
+                    'items': items or [],
+                    'success': items is not None
+                }
+                await websocket.send(json.dumps(response))
+            
+            elif message_type == 'mission_upload':
+                results = await self.mavlink_handler.upload_mission(
+                    data.get('items', []), data.get('system_ids'))
+                
+                response = {
+                    'type': 'mission_upload_response',
+                    'results': results,
+                    'success': bool(results) and all(results.values())
+                }
+                await websocket.send(json.dumps(response))
                 
         except json.JSONDecodeError as e:
             logging.error(f"Invalid JSON message: {e}")